@@ -6,25 +6,40 @@ import os
 import re
 import json
 from dataclasses import dataclass
+from functools import lru_cache
 
-def get_default_vars() -> dict():
+# Test config values: treat as read-only, use `get_default_vars()` to obtain a modifiable copy
+DEFAULT_VARS = {
+    'int_array': [1, 2, 3, 4],
+    'object_array': [
+        {"intval": 1, "stringval": "a"},
+        {"intval": 2, "stringval": "b"},
+        {"intval": 3, "stringval": "c"},
+        {"intval": 4, "stringval": "d"},
+    ]
+}
+
+def get_default_vars() -> dict:
     '''Return test config value dictionary which can be modified without side-effects'''
     return {
-        'int_array': [1, 2, 3, 4],
-        'object_array': [
-            {"intval": 1, "stringval": "a"},
-            {"intval": 2, "stringval": "b"},
-            {"intval": 3, "stringval": "c"},
-            {"intval": 4, "stringval": "d"},
-        ]
+        'int_array': list(DEFAULT_VARS['int_array']),
+        'object_array': [dict(item) for item in DEFAULT_VARS['object_array']],
     }
 
+@lru_cache(maxsize=None)
+def find_default_item(name: str, key_name: str, key_value: str) -> int:
+    '''Get index of first item in default array with matching key value'''
+    return next(i for i, x in enumerate(DEFAULT_VARS[name]) if x[key_name] == key_value)
+
 def json_dumps(value):
     '''Compact JSON text'''
     return json.dumps(value, separators=(',', ':'))
 
+# Matches `array[name=value]` selector expressions
+SELECTOR_RE = re.compile(r'^(.*)?\[(.*)?=(.*)?]')
+
 # Default JSON text
-OBJECT_ARRAY = json_dumps(get_default_vars()['object_array'])
+OBJECT_ARRAY = json_dumps(DEFAULT_VARS['object_array'])
 
 '''Cases grouped by array type, then category containing list of test cases.
 A test case is a python expression equivalent to the JSON operation we want.
@@ -114,6 +129,12 @@ TEST_CASES = {
     }
 }
 
+# JSON fragments surrounding each test case
+CASE_SEPARATOR = b',\n'
+CASE_EXPR = b'\t\t\t{\n\t\t\t\t"expr": '
+CASE_RESULT = b',\n\t\t\t\t"result": '
+CASE_END = b'\n\t\t\t}'
+
 
 @dataclass
 class StringPos:
@@ -156,9 +177,9 @@ def parse_expression(array_name: str, expr: str | tuple[str, str]) -> tuple[str,
         tmp_key = key.replace('[]', '[100:0]')
         if '=' in tmp_key:
             # Require valid python for `array[name=value]` expression
-            m = re.match(r'^(.*)?\[(.*)?=(.*)?]', tmp_key)
+            m = SELECTOR_RE.match(tmp_key)
             name, key_name, key_value = m.group(1), m.group(2), m.group(3)
-            i = next(i for i, x in enumerate(vars[name]) if x[key_name] == key_value)
+            i = find_default_item(name, key_name, key_value)
             # print(f'{name}; {key_name}; {key_value}; {i}; {vars[name]}; {value}')
             if value[0] == '[':
                 tmp_expr = f'del {name}[{i}]'
@@ -175,34 +196,40 @@ def parse_expression(array_name: str, expr: str | tuple[str, str]) -> tuple[str,
 
 
 def main():
-    json_data: bytearray = b'{\n'  # JSON string data
+    chunks: list[bytes] = []  # JSON string data
+    offset = 0  # Running length of JSON string data
     array_tests: dict[str, list[ArrayTestCase]] = {} # array_name, list[ArrayTestCase]
 
+    def append(data: bytes):
+        nonlocal offset
+        chunks.append(data)
+        offset += len(data)
+
+    append(b'{\n')
     for array_name, cases in TEST_CASES.items():
         if array_tests:
-            json_data += b',\n'
-        json_data += f'\t"{array_name}": {{\n'.encode()
+            append(b',\n')
+        append(f'\t"{array_name}": {{\n'.encode())
         array_tests[array_name] = test_cases = []
         # print(f'static constexpr const ArrayTestCase {array_name}_test_cases[] PROGMEM {{')
         for case_index, (title, expressions) in enumerate(cases.items()):
             if case_index:
-                json_data += b',\n'
-            json_data += f'\t\t"{title}": [\n'.encode()
+                append(b',\n')
+            append(f'\t\t"{title}": [\n'.encode())
             for expr_index, expr in enumerate(expressions):
                 expr, result = parse_expression(array_name, expr)
                 expr = expr.encode()
                 result = result.encode()
                 if expr_index:
-                    json_data += b',\n'
-                json_data += b'\t\t\t{\n\t\t\t\t"expr": '
-                expr_pos = StringPos(len(json_data), len(expr))
-                json_data += expr + b',\n\t\t\t\t"result": '
-                result_pos = StringPos(len(json_data), len(result))
-                json_data += result + b'\n\t\t\t}'
+                    append(CASE_SEPARATOR)
+                expr_pos = StringPos(offset + len(CASE_EXPR), len(expr))
+                result_pos = StringPos(expr_pos.offset + len(expr) + len(CASE_RESULT), len(result))
+                append(b''.join((CASE_EXPR, expr, CASE_RESULT, result, CASE_END)))
                 test_cases.append(ArrayTestCase(expr_pos, result_pos))
-            json_data += b'\n\t\t]'
-        json_data += b'\n\t}'
-    json_data += b'\n}'
+            append(b'\n\t\t]')
+        append(b'\n\t}')
+    append(b'\n}')
+    json_data = b''.join(chunks)
 
     if len(sys.argv) > 1:
         path = sys.argv[1]
@@ -7,14 +7,22 @@ import sys
 import json
 import re
 from dataclasses import dataclass, field
+from functools import cached_property, lru_cache
 
 sys.path.insert(1, os.path.expandvars('${SMING_HOME}/../Tools/Python'))
 from evaluator import Evaluator
 
+# Use faster parser if available
+try:
+    from orjson import loads as json_loads
+except ImportError:
+    from json import loads as json_loads
+
 evaluator = Evaluator()
 
 MAX_STRINGID_LEN = 32
 
+# Simple property types map to C++ types, containers are marked with '-'
 CPP_TYPENAMES = {
     'object': '-',
     'array': '-',
@@ -46,6 +54,9 @@ CPP_TYPESIZES = {
 
 STRING_PREFIX = 'fstr_'
 
+# Identifiers are formed from alphanumeric segments, so anything else (including '_') separates words
+IDENTIFIER_SEPARATOR = re.compile(r'[^A-Za-z0-9]+')
+
 databases: dict[str, 'Database'] = {}
 
 class StringTable:
@@ -56,28 +67,36 @@ class StringTable:
     def __init__(self):
         self.keys = ['empty']
         self.values = ['']
+        # Identifiers never contain '_' so numbering repeats with a suffix cannot collide
+        self.ident_counts = dict.fromkeys(self.keys, 1)
+        self.index_by_value = {'': 0}
+        self.ident_by_value = {'': STRING_PREFIX + 'empty'}
 
     def __getitem__(self, value: str | None):
         if value is None:
             return 'nullptr'
-        return STRING_PREFIX + self.keys[self.get_index(str(value))]
+        # Keys are append-only so identifiers never change once assigned
+        value = str(value)
+        ident = self.ident_by_value.get(value)
+        if ident is None:
+            ident = self.ident_by_value[value] = STRING_PREFIX + self.keys[self.get_index(value)]
+        return ident
 
     def get_index(self, value: str) -> int:
-        try:
-            return self.values.index(value or '')
-        except ValueError:
-            pass
+        i = self.index_by_value.get(value or '')
+        if i is not None:
+            return i
         ident = make_identifier(value)[:MAX_STRINGID_LEN]
         if not ident:
             ident = str(len(self.values))
-        if ident in self.keys:
-            i = 0
-            while f'{ident}_{i}' in self.keys:
-                i += 1
-            ident = f'{ident}_{i}'
+        n = self.ident_counts.get(ident, 0)
+        self.ident_counts[ident] = n + 1
+        if n:
+            ident = f'{ident}_{n - 1}'
         i = len(self.keys)
         self.keys.append(ident)
         self.values.append(value)
+        self.index_by_value[value] = i
         return i
 
     def items(self):
@@ -122,23 +141,28 @@ class IntRange(Range):
     def deduce(minval: int, maxval: int) -> IntRange:
         if maxval < minval:
             raise ValueError('Maximum cannot be less than minimum')
-        r = IntRange(minval, maxval, minval < 0 or maxval > 0xffffffff, 8)
-        while minval < r.typemin or maxval > r.typemax:
-            r.bits *= 2
-        if r.bits > 64:
+        is_signed = minval < 0 or maxval > 0xffffffff
+        # Find the narrowest type before creating the range, so typemin/typemax can be cached
+        need = max(maxval.bit_length() if maxval > 0 else 0, (~minval).bit_length() if minval < 0 else 0)
+        if is_signed:
+            need += 1
+        bits = 8
+        while bits < need:
+            bits *= 2
+        if bits > 64:
             raise ValueError(f'Minimum/Maxiomum too large: ({minval}, {maxval})')
-        return r
+        return IntRange(minval, maxval, is_signed, bits)
 
-    @property
+    @cached_property
     def typemin(self):
-        return -(2 ** (self.bits - 1)) if self.is_signed else 0
+        return -(1 << (self.bits - 1)) if self.is_signed else 0
 
-    @property
+    @cached_property
     def typemax(self):
         bits = self.bits
         if self.is_signed:
             bits -= 1
-        return (2 ** bits) - 1
+        return (1 << bits) - 1
 
     @property
     def ctype(self):
@@ -188,7 +212,9 @@ class Property:
         self.ptype = get_ptype(fields)
         self.ctype_override = fields.get('ctype')
         self.default = fields.get('default')
-        self.ctype = CPP_TYPENAMES[self.ptype]
+        self.ctype = CPP_TYPENAMES.get(self.ptype)
+        if not self.ctype:
+            error(f'Invalid property type "{self.ptype}"')
         self.property_type = self.ptype.capitalize()
         self.alias = fields.get('alias')
         self.enum = fields.get('enum')
@@ -206,9 +232,6 @@ class Property:
         minval = self.validate_type(fields.get('minimum'), 'minimum')
         maxval = self.validate_type(fields.get('maximum'), 'maximum')
 
-        if not self.ctype:
-            error(f'Invalid property type "{self.ptype}"')
-
         if self.enum:
             if 'minimum' in fields or 'maximum' in fields:
                 error('enum and minimum/maximum fields are mutually-exclusive')
@@ -280,12 +303,12 @@ class Property:
             raise ValueError(f'Attribute "{attr_name}" must be an {self.ptype}, found {type(value).__name__} ({value})')
         return value
 
-    @property
+    @cached_property
     def ctype_ret(self):
         '''Type to use for accessor return value'''
         return self.ctype_override or self.ctype
 
-    @property
+    @cached_property
     def ctype_set(self):
         '''Type to use for updater value'''
         if self.ptype == 'integer':
@@ -294,18 +317,18 @@ class Property:
             return self.ctype_ret
         return f'const {self.ctype_ret}&'
 
-    @property
+    @cached_property
     def ctype_cast(self):
         '''Integral type for cast when setting'''
         if self.ptype in ['integer', 'enum']:
             return 'int64_t'
         return self.ctype
 
-    @property
+    @cached_property
     def propdata_id(self):
         return 'uint8' if self.enum else self.property_type.lower()
 
-    @property
+    @cached_property
     def data_size(self):
         '''Size of the corresponding C++ storage type'''
         return self.obj.data_size if self.obj else CPP_TYPESIZES[self.ctype]
@@ -352,41 +375,42 @@ class Property:
         assert self.obj
         return make_typename(self.name or 'Root')
 
-    @property
+    @cached_property
     def default_str(self):
         default = self.default
         if self.ptype == 'string':
             return self.parent.database.strings[default]
+        # Most properties have no default (or a zero one)
+        if not default:
+            return 'false' if self.ptype == 'boolean' else '0'
         if self.ptype == 'boolean':
-            return 'true' if default else 'false'
+            return 'true'
         if self.ptype == 'number':
-            return f'const_number_t({self.default})' if self.default else '0'
-        return str(default) if default else 0
+            return f'const_number_t({default})'
+        return str(default)
 
     @property
     def is_root(self):
         '''Is this the root store?'''
         return self.is_store and not self.name
 
-    @property
+    @cached_property
     def store_index(self):
-        prop = self
-        while not prop.is_store:
-            prop = prop.parent
-        store = prop
+        if not self.is_store:
+            return self.parent.store_index
         i = 0
         for prop in self.database.object_properties:
-            if prop is store:
+            if prop is self:
                 return i
             if prop.is_store:
                 i += 1
         assert False
 
-    @property
+    @cached_property
     def is_item(self):
         return self.parent.obj.is_array
 
-    @property
+    @cached_property
     def is_item_member(self):
         return self.is_item or self.parent.is_item_member
 
@@ -394,14 +418,14 @@ class Property:
     def path(self):
         return join_path(self.parent.path, self.name) if self.parent else self.name
 
-    @property
+    @cached_property
     def database(self) -> Database:
         prop = self
         while not isinstance(prop, Database):
             prop = prop.parent
         return prop
 
-    @property
+    @cached_property
     def namespace(self):
         assert self.obj
         if self.obj.ref or (self.is_item and self.parent.obj.ref):
@@ -410,9 +434,14 @@ class Property:
         ns = []
         while prop:
             if not prop.obj.is_array:
-                ns.insert(0, prop.obj.typename_contained)
+                ns.append(prop.obj.typename_contained)
             prop = prop.database if prop.obj.ref else prop.parent
-        return '::'.join(ns)
+        return '::'.join(reversed(ns))
+
+    @cached_property
+    def qualname(self):
+        '''Fully-qualified name of the contained object class'''
+        return f'{self.namespace}::{self.obj.typename_contained}'
 
 
 class ObjectProperty(Property):
@@ -432,42 +461,54 @@ class Object:
     object_properties: list[Property] = field(default_factory=list)
     properties: list[Property] = field(default_factory=list)
 
-    @property
+    @cached_property
     def namespace(self):
         ns = []
         obj = self.parent
         while obj:
             if not obj.is_array:
-                ns.insert(0, obj.typename_contained)
+                ns.append(obj.typename_contained)
             obj = obj.parent
-        return '::'.join(ns)
+        return '::'.join(reversed(ns))
 
-    @property
+    @cached_property
+    def qualname(self):
+        '''Fully-qualified name of the contained class'''
+        return f'{self.namespace}::{self.typename_contained}'
+
+    @cached_property
     def typename(self):
         return make_typename(self.name or 'Root')
 
-    @property
+    @cached_property
     def typename_contained(self):
         return 'Contained' + self.typename
 
-    @property
+    @cached_property
     def typename_updater(self):
         return f'{self.typename}Updater'
 
-    @property
+    @cached_property
     def typename_struct(self):
         return self.typename_contained + '::Struct'
 
-    def get_offset(self, obj: Object):
-        '''Offset of a child object in the data structure'''
+    @cached_property
+    def child_offsets(self) -> dict[int, int]:
+        '''Offsets of child objects in the data structure, keyed by object id'''
+        offsets = {}
         offset = 0
         for c in self.object_properties:
-            if c.obj is obj:
-                return offset
+            offsets.setdefault(id(c.obj), offset)
             offset += c.data_size
-        assert False, 'Not a child'
+        return offsets
 
-    @property
+    def get_offset(self, obj: Object):
+        '''Offset of a child object in the data structure'''
+        offset = self.child_offsets.get(id(obj))
+        assert offset is not None, 'Not a child'
+        return offset
+
+    @cached_property
     def data_size(self):
         '''Size of the corresponding C++ storage'''
         return sum(obj.data_size for obj in self.object_properties) + sum(prop.data_size for prop in self.properties)
@@ -496,23 +537,6 @@ class Object:
     def is_union(self):
         return False
 
-    def __lt__(self, obj: Object):
-        '''Sort lists by dependency'''
-        return obj.depends_on(self)
-
-    def depends_on(self, other: Object):
-        dependencies = []
-        def scan(obj: Object):
-            for prop in obj.object_properties:
-                if other is prop.obj:
-                    return True
-                if prop.obj in dependencies:
-                    continue
-                dependencies.append(prop.obj)
-                scan(prop.obj)
-            return False
-        return scan(self)
-
 
 @dataclass
 class Array(Object):
@@ -554,7 +578,7 @@ class Union(Object):
     def is_union(self):
         return True
 
-    @property
+    @cached_property
     def max_object_size(self):
         return max(prop.data_size for prop in self.object_properties)
 
@@ -562,7 +586,7 @@ class Union(Object):
     def max_property_size(self):
         return max(prop.data_size for prop in self.properties)
 
-    @property
+    @cached_property
     def data_size(self):
         '''Size of the corresponding C++ storage'''
         return self.max_object_size + self.max_property_size
@@ -574,9 +598,9 @@ class Database(Object):
     calcprops: dict[str, Any] = None
     object_defs: dict[Object] = field(default_factory=dict)
     external_objects: dict[Object] = field(default_factory=dict)
-    strings: StringTable = StringTable()
-    forward_decls: set[str] = None
-    include: set[str] = None
+    strings: StringTable = field(default_factory=StringTable)
+    forward_decls: set[str] = field(default_factory=set)
+    include: list[str] = field(default_factory=list)
     enum_props: list[Property] = field(default_factory=list)
 
     @property
@@ -620,18 +644,13 @@ class CodeLines:
         self.source += other.source
 
 
+@lru_cache(maxsize=None)
 def make_identifier(s: str, is_type: bool = False):
     '''Form valid camelCase identifier for a variable (default) or type'''
-    up = is_type
-    s = re.sub(r'[^A-Za-z0-9]+', '_', s)
-    ident = ''
-    for c in s:
-        if c in ['-', '_']:
-            up = True
-        else:
-            ident += c.upper() if up else c
-            up = False
-    return ident
+    head, *tail = IDENTIFIER_SEPARATOR.split(s)
+    if is_type:
+        head = head[:1].upper() + head[1:]
+    return head + ''.join(word[:1].upper() + word[1:] for word in tail)
 
 
 def make_comment(s: str):
@@ -646,6 +665,7 @@ def join_path(path: str, name: str):
     return path + name
 
 
+@lru_cache(maxsize=None)
 def make_typename(s: str):
     '''Form valid CamelCase type name'''
     return make_identifier(s, True)
@@ -653,12 +673,19 @@ def make_typename(s: str):
 
 def make_string(s: str):
     '''Encode a string value'''
-    return '"' + s.replace('"', '\\"').encode('unicode-escape').decode('utf-8') + '"'
+    return json.dumps(s, ensure_ascii=False)
 
 
-def make_static_initializer(entries: list, term_str: str = '') -> list:
+def make_static_initializer(entries: list, term_str: str = '') -> tuple:
     '''Create a static structured initialiser list from given items'''
-    return [ '{', [str(e) + ',' for e in entries], '}' + term_str]
+    return ('{', [str(e) + ',' for e in entries], '}' + term_str)
+
+
+@lru_cache(maxsize=None)
+def get_meta_validator():
+    '''Get validator for checking schema files, constructed on first use'''
+    from jsonschema import Draft7Validator
+    return Draft7Validator(Draft7Validator.META_SCHEMA)
 
 
 def load_schema(filename: str) -> Database:
@@ -676,46 +703,49 @@ def load_schema(filename: str) -> Database:
 
     calc_props: dict[str, Any] = {}
 
-    def calculate_props(props: dict, path: str):
-        new_props = {}
-        keys_by_id = {}
-        for key, value in props.items():
-            if key.startswith('@'):
-                new_key = key[1:]
-                new_path = f'{path}/{new_key}'
-                try:
-                    new_value = evaluate(value)
-                except Exception as e:
-                    raise ValueError(f'{new_path} in "{filename}"') from e
-                calc_props[new_path] = new_value
-                key = new_key
-                value = new_value
-            new_props[key] = value
-            id = make_identifier(key)
-            if not id:
-                raise ValueError(f'Invalid key "{key}"')
-            key_conflict = keys_by_id.get(id)
-            if key_conflict:
-                raise ValueError(f'Key "{key}" conflicts with "{key_conflict}"')
-            keys_by_id[id] = key
-        props.clear()
-        props.update(new_props)
-        for k, v in props.items():
-            if isinstance(v, dict):
-                calculate_props(v, f'{path}/{k}')
+    def calculate_props(root: dict):
+        # Visit nodes depth-first using a stack: children are pushed in reverse so they're processed in order
+        stack = [(root, '')]
+        while stack:
+            props, path = stack.pop()
+            new_props = {}
+            keys_by_id = {}
+            children = []
+            for key, value in props.items():
+                if key.startswith('@'):
+                    new_key = key[1:]
+                    new_path = f'{path}/{new_key}'
+                    try:
+                        new_value = evaluate(value)
+                    except Exception as e:
+                        raise ValueError(f'{new_path} in "{filename}"') from e
+                    calc_props[new_path] = new_value
+                    key = new_key
+                    value = new_value
+                new_props[key] = value
+                if isinstance(value, dict):
+                    children.append((value, f'{path}/{key}'))
+                id = make_identifier(key)
+                if not id:
+                    raise ValueError(f'Invalid key "{key}"')
+                key_conflict = keys_by_id.get(id)
+                if key_conflict:
+                    raise ValueError(f'Key "{key}" conflicts with "{key_conflict}"')
+                keys_by_id[id] = key
+            props.clear()
+            props.update(new_props)
+            stack += reversed(children)
 
 
     '''Load JSON configuration schema and validate
     '''
-    with open(filename, 'r', encoding='utf-8') as f:
-        schema = json.load(f)
+    with open(filename, 'rb') as f:
+        schema = json_loads(f.read())
 
-    calculate_props(schema, '')
+    calculate_props(schema)
 
     try:
-        from jsonschema import Draft7Validator
-        v = Draft7Validator(Draft7Validator.META_SCHEMA)
-        errors = list(v.iter_errors(schema))
+        errors = list(get_meta_validator().iter_errors(schema))
         if errors:
             for e in errors:
                 print(f'{e.message} @ {e.path}')
@@ -808,7 +838,8 @@ def parse_property(path: str, parent_prop: Property, key: str, fields: dict) ->
 
         prop_type = get_ptype(ref_node or fields)
 
-        if prop_type not in ['object', 'array', 'union']:
+        # Container types are marked '-' as they have no direct C++ equivalent
+        if CPP_TYPENAMES.get(prop_type) != '-':
             if ref_node:
                 # For simple properties the definition is a template, so copy over any non-existent values
                 if 'enum' in ref_node and 'enum' in fields:
@@ -887,7 +918,7 @@ def parse_property(path: str, parent_prop: Property, key: str, fields: dict) ->
 
 def parse_database(database: Database):
     '''Validate and parse schema into python objects'''
-    database.include = database.schema.get('include', set())
+    database.include += database.schema.get('include', [])
     root_obj = Object(database, '', None, database.schema_id)
     database.schema['object'] = root_obj
     root = ObjectProperty(database, '', {}, root_obj)
@@ -895,17 +926,44 @@ def parse_database(database: Database):
     root.is_store = True
     parse_properties(f'/{database.name}/properties', root, database.schema.get('properties', {}))
 
+def sort_by_dependency(objects: list[Object]) -> list[Object]:
+    '''Order objects so that any object contained within another comes first'''
+    # Objects are compared by identity as dataclass equality compares all fields
+    pending = {id(obj) for obj in objects}
+    visited = set()
+    result = []
+
+    def visit(obj: Object):
+        for prop in obj.object_properties:
+            child = prop.obj
+            if id(child) in visited:
+                continue
+            visited.add(id(child))
+            visit(child)
+            if id(child) in pending:
+                result.append(child)
+
+    for obj in objects:
+        if id(obj) not in visited:
+            visited.add(id(obj))
+            visit(obj)
+            result.append(obj)
+    return result
+
+
 def generate_database(db: Database) -> CodeLines:
     '''Generate content for entire database'''
 
-    db.forward_decls = {
+    db.forward_decls |= {
         'ContainedRoot',
         'RootUpdater'
     }
 
     external_defs = []
     for obj in db.external_objects.values():
-        db.include.add(f'{obj.schema_id}.h')
+        include = f'{obj.schema_id}.h'
+        if include not in db.include:
+            db.include.append(include)
         ns = obj.namespace
         external_defs += [
             f'using {obj.typename_contained} = {ns}::{obj.typename_contained};',
@@ -971,7 +1029,7 @@ def generate_database(db: Database) -> CodeLines:
     ]]
 
 
-    for obj in sorted(db.object_defs.values()):
+    for obj in sort_by_dependency(db.object_defs.values()):
         prop = ObjectProperty(db, obj.name, {}, obj)
         lines.append(generate_object(db, prop))
 
@@ -989,12 +1047,12 @@ def generate_database(db: Database) -> CodeLines:
             ' */'
         ]
     ]
-    def generate_outer_class(parent: Object, object_prop: ObjectProperty, store_offset: int) -> list:
+    def generate_outer_class(parent: Object, index: int, object_prop: ObjectProperty, store_offset: int) -> tuple:
         obj = object_prop.obj
-        template = f'ConfigDB::OuterObjectTemplate<{obj.typename_contained}, {obj.typename_updater}, {db.typename}, {object_prop.store_index}, {parent.typename_contained}, {parent.object_properties.index(object_prop)}, {store_offset}>'
+        template = f'ConfigDB::OuterObjectTemplate<{obj.typename_contained}, {obj.typename_updater}, {db.typename}, {object_prop.store_index}, {parent.typename_contained}, {index}, {store_offset}>'
         if not object_prop.is_store:
             store_offset += parent.get_offset(obj)
-        return [
+        return (
             '',
             f'class {object_prop.typename_outer}: public {template}',
             '{',
@@ -1002,26 +1060,27 @@ def generate_database(db: Database) -> CodeLines:
             [
                 'using OuterObjectTemplate::OuterObjectTemplate;',
             ],
-            *[generate_outer_class(obj, prop, store_offset) for prop in obj.object_properties if not object_prop.is_item],
+            *(generate_outer_class(obj, i, prop, store_offset) for i, prop in enumerate(obj.object_properties) if not object_prop.is_item),
             '};'
-        ] if obj.object_properties and not obj.is_union else [
-            f'using {object_prop.typename_outer} = {template};'
-        ]
-    for prop in db.object_properties:
-        lines.header.append(generate_outer_class(db, prop, 0))
+        ) if obj.object_properties and not obj.is_union else (
+            f'using {object_prop.typename_outer} = {template};',
+        )
+    for index, prop in enumerate(db.object_properties):
+        lines.header.append(generate_outer_class(db, index, prop, 0))
 
     lines.header += ['};']
 
+    # Walk object tree depth-first to find unions, without recursion
     unions = {}
-    def find_unions(object_prop: ObjectProperty | Database):
-        for prop in object_prop.obj.object_properties:
-            obj = prop.obj
-            if obj.is_union:
-                if obj.schema_id == db.schema_id:
-                    unions[f'{prop.namespace}::{obj.typename_contained}'] = obj
-            else:
-                find_unions(prop)
-    find_unions(db)
+    stack = list(reversed(db.object_properties))
+    while stack:
+        prop = stack.pop()
+        obj = prop.obj
+        if obj.is_union:
+            if obj.schema_id == db.schema_id:
+                unions[prop.qualname] = obj
+        else:
+            stack += reversed(obj.object_properties)
     if unions:
         lines.header += ['']
         for typename, obj in unions.items():
@@ -1081,11 +1140,11 @@ def generate_database(db: Database) -> CodeLines:
 
 def generate_structure(db: Database) -> list[str]:
     structure = []
+    def add(indent: int, offset: int, id: str, typename: str):
+        structure.append(f'{offset:4} {"".ljust(indent*3)} {id}: {typename}')
     def print_structure(object_prop: ObjectProperty, indent: int, offset: int):
-        def add(offset: int, id: str, typename: str):
-            structure.append(f'{offset:4} {"".ljust(indent*3)} {id}: {typename}')
         obj = object_prop.obj
-        add(offset, object_prop.id, obj.base_class)
+        add(indent, offset, object_prop.id, obj.base_class)
         if obj.is_array:
             return
         for prop in obj.object_properties:
@@ -1096,7 +1155,7 @@ def generate_structure(db: Database) -> list[str]:
             offset += obj.max_object_size
         indent += 1
         for prop in obj.properties:
-            add(offset, prop.id, prop.ctype)
+            add(indent, offset, prop.id, prop.ctype)
             if not obj.is_union:
                 offset += prop.data_size
     for prop in db.object_properties:
@@ -1105,7 +1164,7 @@ def generate_structure(db: Database) -> list[str]:
     return structure
 
 
-def declare_templated_class(obj: Object, tparams: list = None, is_updater: bool = False) -> list[str]:
+def declare_templated_class(obj: Object, tparams: list = None, is_updater: bool = False) -> tuple[str, ...]:
     typename = obj.typename_updater if is_updater else obj.typename_contained
     template = 'UpdaterTemplate' if is_updater else 'Template'
     params = [f'{obj.typename_contained}']
@@ -1113,12 +1172,12 @@ def declare_templated_class(obj: Object, tparams: list = None, is_updater: bool
         params.insert(0, typename)
     if tparams:
         params += tparams
-    return [
+    return (
         '',
         f'class {typename}: public ConfigDB::{obj.base_class}{template}<{", ".join(params)}>',
         '{',
         'public:',
-    ]
+    )
 
 
 def generate_enum_typeinfo(db: Database, prop: Property) -> CodeLines:
@@ -1220,7 +1279,7 @@ def generate_typeinfo(db: Database, object_prop: ObjectProperty) -> CodeLines:
             '.type = PropertyType::Object',
             '.name = ' + ('fstr_empty' if obj.is_array else db.strings[prop.name]),
             f'.offset = {offset}',
-            f'.variant = {{.object = &{prop.obj.namespace}::{prop.obj.typename_contained}::typeinfo}}'
+            f'.variant = {{.object = &{prop.obj.qualname}::typeinfo}}'
         ]]
         add_alias(prop.alias)
         if not obj.is_union:
@@ -1287,7 +1346,7 @@ def generate_typeinfo(db: Database, object_prop: ObjectProperty) -> CodeLines:
 
     lines.source += [
         '',
-        f'const ObjectInfo {object_prop.namespace}::{obj.typename_contained}::typeinfo PROGMEM',
+        f'const ObjectInfo {object_prop.qualname}::typeinfo PROGMEM',
         '{',
         *([str(e) + ','] for e in [
             f'.type = ObjectType::{obj.classname}',
@@ -1321,7 +1380,7 @@ def generate_object_struct(object_prop: ObjectProperty) -> CodeLines:
 
     obj = object_prop.obj
 
-    typename = f'{object_prop.namespace}::{obj.typename_contained}'
+    typename = object_prop.qualname
     return CodeLines([
         '',
         'struct __attribute__((packed)) Struct {',
@@ -1375,13 +1434,13 @@ def generate_property_accessors(obj: Object) -> list:
             return f'{prop.ctype_override}({value})'
         return value
 
-    return [*((
+    return [(
         '',
         f'{prop.ctype_ret} get{prop.typename}() const',
         '{',
         [f'return {get_value_expr(index, prop)};'],
         '}',
-        ) for index, prop in enumerate(obj.properties))]
+        ) for index, prop in enumerate(obj.properties)]
 
 
 def generate_property_write_accessors(obj: Object) -> list:
@@ -1418,7 +1477,7 @@ def generate_property_write_accessors(obj: Object) -> list:
                 ) for index, prop in enumerate(obj.object_properties))
         ]
 
-    return [*((
+    return [(
         '',
         f'void set{prop.typename}({prop.ctype_set} value)',
         '{',
@@ -1429,7 +1488,7 @@ def generate_property_write_accessors(obj: Object) -> list:
         '{',
         [f'resetPropertyValue({index});'],
         '}'
-        ) for index, prop in enumerate(obj.properties))]
+        ) for index, prop in enumerate(obj.properties)]
 
 
 
@@ -1511,7 +1570,7 @@ def generate_object(db: Database, object_prop: ObjectProperty) -> CodeLines:
     return lines
 
 
-def generate_updater(object_prop: ObjectProperty) -> list:
+def generate_updater(object_prop: ObjectProperty) -> tuple:
     '''Generate code for Object Updater implementation'''
 
     constructors = generate_contained_constructors(object_prop, True)
@@ -1533,21 +1592,21 @@ def generate_updater(object_prop: ObjectProperty) -> list:
                 '}',
             ] for tag, item in enumerate(obj.items.obj.object_properties)
         ] if isinstance(obj.items.obj, Union) else []
-        return [
+        return (
             *declare_templated_class(obj, [obj.items.obj.typename_updater], True),
             constructors,
             *union_array_methods,
             '};',
-        ]
+        )
 
     if obj.is_array:
-        return [
+        return (
             *declare_templated_class(obj, [obj.items.ctype_ret, obj.items.ctype_set, obj.items.ctype_cast], True),
             constructors,
             '};',
-        ]
+        )
 
-    return [
+    return (
         *declare_templated_class(obj, [], True),
         constructors,
         *generate_property_write_accessors(obj),
@@ -1556,7 +1615,7 @@ def generate_updater(object_prop: ObjectProperty) -> list:
             *(f'{prop.obj.typename_updater} {prop.id};' for prop in obj.object_properties)
         ],
         '};'
-    ]
+    )
 
 
 def generate_contained_constructors(object_prop: ObjectProperty, is_updater = False) -> list:
@@ -1610,18 +1669,42 @@ def write_file(content: list[str | list], filename: str):
         '',
     ]
 
-    def dump_output(items: list, indent: str):
-        for item in items:
-            if item:
-                if isinstance(item, str):
-                    f.write(f'{indent}{item}\n')
-                else:
-                    dump_output(item, indent + '    ')
-            elif item is not None:
-                f.write('\n')
+    def dump_output(items: list) -> list[str]:
+        '''Flatten nested content into indented lines
+
+        Uses a stack of partially-consumed iterators rather than recursion,
+        so each line is emitted directly however deeply it is nested.
+        '''
+        output = []
+        indents = ['']  # Indent strings by nesting level, created on first use
+        stack = [iter(items)]
+        while stack:
+            indent = indents[len(stack) - 1]
+            for item in stack[-1]:
+                if item:
+                    if isinstance(item, str):
+                        output.append(f'{indent}{item}\n')
+                    else:
+                        if len(indents) == len(stack):
+                            indents.append(indent + '    ')
+                        stack.append(iter(item))
+                        break
+                elif item is not None:
+                    output.append('\n')
+            else:
+                stack.pop()
+        return output
 
+    # Leave existing file untouched if content hasn't changed to avoid unnecessary rebuilds
+    new_content = ''.join(dump_output(comment + content))
+    try:
+        with open(filename, 'r', encoding='utf-8') as f:
+            if f.read() == new_content:
+                return
+    except FileNotFoundError:
+        pass
     with open(filename, 'w', encoding='utf-8') as f:
-        dump_output(comment + content, '')
+        f.write(new_content)
 
 
 def main():